@@ -27,14 +27,26 @@
 #then save using "CTRL + O, press Enter, CTRL + X"
 # now run the code using "python flight_parser.py -i data/db.csv"
 # run "python3 flight_parser.py -i data/db.csv -o flights_output.json"
+# add "--compact" to write db.json without indentation (smaller file)
 #run "python3 flight_parser.py -d data
+# for big files it also runs under PyPy: "pypy3 flight_parser.py -i data/db.csv"
+# (orjson is optional, without it the standard json module is used)
 
 
 import argparse
 import csv
 import json
 import os
-from datetime import datetime
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:  # optional, stdlib json is used without it
+    orjson = None
 
 CSV_HEADER = [
     "flight_id",
@@ -45,11 +57,54 @@ CSV_HEADER = [
     "price",
 ]
 
+_CSV_HEADER_TUPLE = tuple(CSV_HEADER)
+_CSV_HEADER_KEYS = frozenset(CSV_HEADER)
+
 DATETIME_FORMAT = "%Y-%m-%d %H:%M"
+_DATETIME_RE = re.compile(r"([0-9]{4})-([0-9]{2})-([0-9]{2}) ([0-9]{2}):([0-9]{2})")
+
+# 1 MiB file buffers: fewer read/write syscalls on large CSV/JSON files
+IO_BUFFER_SIZE = 1 << 20
 
 DISALLOWED_AIRPORT_CODES = {"XXX"}
 
 
+def _is_airport_code(code):
+    """Return True if code is a valid, non-disallowed 3-letter airport code."""
+    return (
+        len(code) == 3 and code.isupper() and code.isalpha()
+        and code not in DISALLOWED_AIRPORT_CODES
+    )
+
+
+def _parse_fixed_dt(s):
+    """
+    Parse a DATETIME_FORMAT string into an ordering key in minutes:
+    date.toordinal() * 1440 + minutes since midnight.
+
+    The zero-padded, ASCII-digit form is matched with a precompiled regex
+    instead of going through strptime; anything else (e.g. unpadded fields
+    or non-ASCII digits) falls back to strptime, so the same strings are
+    accepted. Raises ValueError for invalid input, like strptime.
+    """
+    m = _DATETIME_RE.fullmatch(s)
+    if m is not None:
+        year, month, mday, hour, minute = map(int, m.groups())
+        day = date(year, month, mday).toordinal()
+        if hour > 23 or minute > 59:
+            raise ValueError(f"time data {s!r} does not match format {DATETIME_FORMAT!r}")
+    else:
+        dt = datetime.strptime(s, DATETIME_FORMAT)
+        day, hour, minute = dt.toordinal(), dt.hour, dt.minute
+    return day * 1440 + hour * 60 + minute
+
+
+@lru_cache(maxsize=65536)
+def _parse_dt(s):
+    """Parse a DATETIME_FORMAT string, memoized since timestamps repeat a lot."""
+    return _parse_fixed_dt(s)
+
+
 def parse_args():
     """Set up and parse command-line arguments using argparse."""
     parser = argparse.ArgumentParser(
@@ -70,6 +125,10 @@ def parse_args():
         "-o", "--output", metavar="OUTPUT_JSON",
         help="Optional custom output path for valid flights JSON (default: db.json).",
     )
+    parser.add_argument(
+        "--compact", action="store_true",
+        help="Write the valid flights JSON without indentation (smaller, faster to write).",
+    )
 
     return parser.parse_args()
 
@@ -82,22 +141,49 @@ def ensure_file_exists(path):
         raise ValueError(f"ERROR: Not a CSV file: {path}")
 
 
+def _is_csv_entry(entry):
+    """Return True if a scandir entry is a .csv file."""
+    return entry.name.lower().endswith(".csv") and entry.is_file()
+
+
 def ensure_directory_exists(path):
     """Check that directory exists and contains at least one .csv file."""
     if not os.path.isdir(path):
         raise NotADirectoryError(f"ERROR: Directory not found: {path}")
 
-    csv_files = [
-        f for f in os.listdir(path)
-        if f.lower().endswith(".csv")
-    ]
-    if not csv_files:
+    with os.scandir(path) as entries:
+        has_csv = any(_is_csv_entry(e) for e in entries)
+    if not has_csv:
         raise FileNotFoundError(f"ERROR: Directory '{path}' contains no CSV files.")
 
 
 def is_header_row(row):
     """Return True if the row is exactly the expected header."""
-    return [cell.strip() for cell in row] == CSV_HEADER
+    # cheap length/first-cell checks reject data rows without building a tuple
+    if len(row) != len(_CSV_HEADER_TUPLE) or row[0].strip() != _CSV_HEADER_TUPLE[0]:
+        return False
+    return tuple(cell.strip() for cell in row) == _CSV_HEADER_TUPLE
+
+
+class _LineFeed:
+    """
+    Iterator that hands csv.reader exactly one pending line.
+
+    Lets one reader be reused for the whole file while each line is still
+    parsed on its own, as if it were the only input.
+    """
+
+    def __init__(self):
+        self.line = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line, self.line = self.line, None
+        if line is None:
+            raise StopIteration
+        return line
 
 
 def validate_flight_row(fields):
@@ -115,28 +201,27 @@ def validate_flight_row(fields):
         errors.append("missing required fields")
         return False, None, errors
 
-    flight_id, origin, destination, dep_str, arr_str, price_str = [f.strip() for f in fields]
+    # strip() hands back the same object when there is nothing to strip,
+    # so this only allocates for fields that really have padding
+    flight_id, origin, destination, dep_str, arr_str, price_str = map(str.strip, fields)
 
     # flight_id rules
-    if len(flight_id) < 2 or not flight_id.isalnum():
+    id_len = len(flight_id)
+    if id_len < 2 or not flight_id.isalnum():
         errors.append("invalid flight_id")
-    if len(flight_id) > 8:
+    if id_len > 8:
         errors.append("flight_id too long (more than 8 characters)")
 
     # origin
     if not origin:
         errors.append("missing origin field")
-    elif len(origin) != 3 or not origin.isupper() or not origin.isalpha():
-        errors.append("invalid origin code")
-    elif origin in DISALLOWED_AIRPORT_CODES:
+    elif not _is_airport_code(origin):
         errors.append("invalid origin code")
 
     # destination
     if not destination:
         errors.append("missing destination field")
-    elif len(destination) != 3 or not destination.isupper() or not destination.isalpha():
-        errors.append("invalid destination code")
-    elif destination in DISALLOWED_AIRPORT_CODES:
+    elif not _is_airport_code(destination):
         errors.append("invalid destination code")
 
     # datetime validation
@@ -146,12 +231,12 @@ def validate_flight_row(fields):
     arr_ok = True
 
     try:
-        dep_dt = datetime.strptime(dep_str, DATETIME_FORMAT)
+        dep_dt = _parse_dt(dep_str)
     except ValueError:
         dep_ok = False
 
     try:
-        arr_dt = datetime.strptime(arr_str, DATETIME_FORMAT)
+        arr_dt = _parse_dt(arr_str)
     except ValueError:
         arr_ok = False
 
@@ -163,7 +248,7 @@ def validate_flight_row(fields):
         if not arr_ok:
             errors.append("invalid arrival datetime")
 
-    if dep_dt and arr_dt and arr_dt <= dep_dt:
+    if dep_ok and arr_ok and arr_dt <= dep_dt:
         errors.append("arrival before departure")
 
     # price validation
@@ -181,42 +266,61 @@ def validate_flight_row(fields):
 
     return True, {
         "flight_id": flight_id,
-        "origin": origin,
-        "destination": destination,
+        # a few hundred airports repeat across every row, so share one
+        # string object per code instead of one per record
+        "origin": sys.intern(origin),
+        "destination": sys.intern(destination),
         "departure_datetime": dep_str,
         "arrival_datetime": arr_str,
         "price": price_val,
     }, []
 
 
-def parse_csv_file(path, single_file=True):
-    """Parse a single CSV file and report valid + invalid lines."""
-    valid_records = []
-    error_lines = []
+def iter_csv_file(path, single_file=True):
+    """
+    Parse a single CSV file lazily.
+
+    Yields (True, record_dict) for each valid flight and (False, error_line)
+    for each invalid or comment line, in file order.
+    """
     seen_header = False
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    field_limit = csv.field_size_limit()
+    line_prefix = "Line " if single_file else os.path.basename(path) + " Line "
 
-    with open(path, "r", encoding="utf-8") as f:
+    with open(path, "r", encoding="utf-8", buffering=IO_BUFFER_SIZE) as f:
         for line_no, line in enumerate(f, start=1):
             raw_line = line.rstrip("\n")
 
-            if raw_line.strip() == "":
-                continue
-
-            stripped = raw_line.lstrip()
+            # only lines starting with whitespace need stripping to spot
+            # blank lines and indented comments
+            if not raw_line or raw_line[0].isspace():
+                stripped = raw_line.lstrip()
+                if not stripped:
+                    continue
+            else:
+                stripped = raw_line
 
             if stripped.startswith("#"):
                 msg = "comment line, ignored for data parsing"
-                prefix = f"{'Line' if single_file else os.path.basename(path)+' Line'} {line_no}: "
-                error_lines.append(f"{prefix}{raw_line} → {msg}")
+                prefix = f"{line_prefix}{line_no}: "
+                yield False, f"{prefix}{raw_line} → {msg}"
                 continue
 
-            reader = csv.reader([raw_line])
-            try:
-                row = next(reader)
-            except:
-                prefix = f"{'Line' if single_file else os.path.basename(path)+' Line'} {line_no}: "
-                error_lines.append(f"{prefix}{raw_line} → could not parse CSV line")
-                continue
+            # without quotes csv.reader splits on commas exactly like
+            # str.split does, so it is only needed for quoted lines (or
+            # lines long enough to trip its field size limit)
+            if '"' not in raw_line and len(raw_line) <= field_limit:
+                row = raw_line.split(",")
+            else:
+                feed.line = raw_line
+                try:
+                    row = next(reader)
+                except csv.Error:
+                    prefix = f"{line_prefix}{line_no}: "
+                    yield False, f"{prefix}{raw_line} → could not parse CSV line"
+                    continue
 
             if not seen_header and is_header_row(row):
                 seen_header = True
@@ -224,14 +328,38 @@ def parse_csv_file(path, single_file=True):
 
             is_valid, record, errs = validate_flight_row(row)
             if is_valid:
-                valid_records.append(record)
+                yield True, record
             else:
-                prefix = f"{'Line' if single_file else os.path.basename(path)+' Line'} {line_no}: "
-                error_lines.append(f"{prefix}{raw_line} → {', '.join(errs)}")
+                prefix = f"{line_prefix}{line_no}: "
+                yield False, f"{prefix}{raw_line} → {', '.join(errs)}"
 
+
+def parse_csv_file(path, single_file=True):
+    """Parse a single CSV file and report valid + invalid lines."""
+    valid_records = []
+    error_lines = []
+    for is_valid, item in iter_csv_file(path, single_file):
+        if is_valid:
+            valid_records.append(item)
+        else:
+            error_lines.append(item)
     return valid_records, error_lines
 
 
+def _split_results(results, errors):
+    """Yield the records from iter_csv_file results, appending error lines to errors."""
+    for is_valid, item in results:
+        if is_valid:
+            yield item
+        else:
+            errors.append(item)
+
+
+def _parse_directory_file(path):
+    """Parse one CSV file of a directory run (module-level so it pickles)."""
+    return parse_csv_file(path, single_file=False)
+
+
 def parse_directory(path):
     """Parse all CSV files in a directory with robust error handling."""
     ensure_directory_exists(path)
@@ -239,51 +367,102 @@ def parse_directory(path):
     all_valid = []
     all_errors = []
 
-    for filename in sorted(os.listdir(path)):
-        if filename.lower().endswith(".csv"):
-            file_path = os.path.join(path, filename)
-            print(f"Processing file: {filename}")
-            valid, errors = parse_csv_file(file_path, single_file=False)
-            all_valid.extend(valid)
-            all_errors.extend(errors)
+    with os.scandir(path) as it:
+        entries = sorted((e for e in it if _is_csv_entry(e)), key=lambda e: e.name)
+    for entry in entries:
+        print(f"Processing file: {entry.name}")
+
+    # files are independent, so parse them in separate processes;
+    # map() yields results in the same (sorted) order as the input
+    file_paths = [entry.path for entry in entries]
+    workers = min(len(file_paths), os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_parse_directory_file, file_paths))
+    else:
+        results = [_parse_directory_file(p) for p in file_paths]
+
+    for valid, errors in results:
+        all_valid.extend(valid)
+        all_errors.extend(errors)
 
     return all_valid, all_errors
 
 
-def save_json(records, path="db.json"):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(records, f, indent=2)
+def _encode_record(record, compact=False):
+    """Encode one record as JSON bytes, indented to sit inside the list unless compact."""
+    # json formats floats with repr(), which uses exponent form ("1e+16",
+    # "1e-07") outside [1e-4, 1e16) where orjson writes "1e16" / "1e-7", and
+    # orjson writes null for NaN/Infinity; only flight records as built by
+    # validate_flight_row (the CSV_HEADER keys and a float price in that
+    # range) go to orjson, so db.json does not depend on whether it is
+    # installed, and any other records are left to json
+    price = record.get("price") if isinstance(record, dict) else None
+    if (orjson is not None and isinstance(price, float)
+            and (price == 0 or 1e-4 <= abs(price) < 1e16)
+            and record.keys() == _CSV_HEADER_KEYS):
+        data = orjson.dumps(record, option=None if compact else orjson.OPT_INDENT_2)
+    elif compact:
+        data = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    else:
+        data = json.dumps(record, ensure_ascii=False, indent=2).encode("utf-8")
+
+    if compact:
+        return data
+    return b"  " + data.replace(b"\n", b"\n  ")
+
+
+def save_json(records, path="db.json", compact=False):
+    """
+    Write records as a JSON array, streaming one record at a time.
+
+    records can be any iterable, e.g. a generator still reading the CSV.
+    Returns the number of records written.
+    """
+    start, sep, end = (b"[", b",", b"]") if compact else (b"[\n", b",\n", b"\n]")
+    count = 0
+    with open(path, "wb", buffering=IO_BUFFER_SIZE) as f:
+        prefix = start
+        for record in records:
+            f.write(prefix)
+            f.write(_encode_record(record, compact))
+            prefix = sep
+            count += 1
+        f.write(end if count else b"[]")
+    return count
 
 
 def save_errors(errors, path="errors.txt"):
     with open(path, "w", encoding="utf-8") as f:
-        for e in errors:
-            f.write(e + "\n")
+        if errors:
+            f.write("\n".join(errors) + "\n")
 
 
 def main():
     args = parse_args()
+    output_json = args.output or "db.json"
 
     try:
         if args.input:
             ensure_file_exists(args.input)
-            valid, errors = parse_csv_file(args.input, single_file=True)
+            # stream valid records straight into the JSON file
+            errors = []
+            valid = _split_results(iter_csv_file(args.input, single_file=True), errors)
             source_desc = args.input
         else:
             ensure_directory_exists(args.directory)
             valid, errors = parse_directory(args.directory)
             source_desc = f"all CSVs in {args.directory}"
+        valid_count = save_json(valid, output_json, compact=args.compact)
     except Exception as e:
         print(e)
         return
 
-    output_json = args.output or "db.json"
-    save_json(valid, output_json)
     save_errors(errors)
 
     print("\nSUMMARY")
     print(f"Parsed source: {source_desc}")
-    print(f"Valid flights:   {len(valid)} (saved to {output_json})")
+    print(f"Valid flights:   {valid_count} (saved to {output_json})")
     print(f"Invalid/comment: {len(errors)} lines (saved to errors.txt)")
 
 